@@ -1,47 +1,228 @@
 
-from langchain_community.embeddings import HuggingFaceEmbeddings
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_community.vectorstores import FAISS
-from langchain.chains import RetrievalQA
 from langchain_groq import ChatGroq
-from langchain.prompts import PromptTemplate
-from langchain_community.document_loaders import PyPDFLoader, Docx2txtLoader, TextLoader
+from langchain_core.documents import Document
+from langchain_core.prompts import PromptTemplate
+import asyncio
+import io
+import json
 import os
+import platform
+import re
+import threading
+import requests
+from functools import lru_cache
 from dotenv import load_dotenv
 
 load_dotenv()
 
+def extract_pdf_pages(data: bytes) -> list[str]:
+    from pypdf import PdfReader
+    reader = PdfReader(io.BytesIO(data))
+    return [page.extract_text() or "" for page in reader.pages]
+
+_WORD_NS = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_MC_NS = "{http://schemas.openxmlformats.org/markup-compatibility/2006}"
+
+_DOCX_RUN_TEXT_TAGS = tuple(f"{_WORD_NS}{tag}" for tag in ("t", "tab", "ptab", "br", "cr"))
+
+def _docx_run_text(node) -> str:
+    # Same mapping as python-docx's run text: tabs become "\t", line breaks "\n"
+    tag = node.tag[len(_WORD_NS):]
+    if tag == "t":
+        return node.text or ""
+    if tag in ("tab", "ptab"):
+        return "\t"
+    if tag == "br" and node.get(f"{_WORD_NS}type") not in (None, "textWrapping"):
+        return ""
+    return "\n"
+
+def _docx_paragraph_lines(element) -> list[str]:
+    # Every w:p in document order, including those inside tables and text boxes.
+    # Runs are attributed to their nearest enclosing paragraph so a text box nested
+    # in a paragraph is not repeated as part of its host. Word also writes each text
+    # box a second time under mc:Fallback for older readers; that copy is skipped.
+    lines = []
+    for paragraph in element.iter(f"{_WORD_NS}p"):
+        if next(paragraph.iterancestors(f"{_MC_NS}Fallback"), None) is not None:
+            continue
+        parts = []
+        for node in paragraph.iter(*_DOCX_RUN_TEXT_TAGS):
+            run = node.getparent()
+            # w:tab also defines tab stops under w:pPr; only run content is text
+            if run is None or run.tag != f"{_WORD_NS}r":
+                continue
+            owner = run.getparent()
+            while owner is not None and owner.tag != f"{_WORD_NS}p":
+                owner = owner.getparent()
+            if owner is paragraph:
+                parts.append(_docx_run_text(node))
+        text = "".join(parts).strip()
+        if text:
+            lines.append(text)
+    return lines
+
+def extract_docx_text(data: bytes) -> str:
+    """Extract text from a DOCX file, including tables, text boxes, headers and footers."""
+    import docx
+    document = docx.Document(io.BytesIO(data))
+
+    headers, footers = [], []
+    for section in document.sections:
+        if not section.header.is_linked_to_previous:
+            headers.extend(_docx_paragraph_lines(section.header.part.element))
+        if not section.footer.is_linked_to_previous:
+            footers.extend(_docx_paragraph_lines(section.footer.part.element))
+    return "\n".join(headers + _docx_paragraph_lines(document.element.body) + footers)
+
 def load_document(file_path: str):
     if file_path.endswith(".pdf"):
-        loader = PyPDFLoader(file_path)
+        with open(file_path, "rb") as f:
+            pages = extract_pdf_pages(f.read())
+        return [Document(page_content=text, metadata={"source": file_path, "page": i}) for i, text in enumerate(pages)]
     elif file_path.endswith(".docx"):
-        loader = Docx2txtLoader(file_path)
+        with open(file_path, "rb") as f:
+            text = extract_docx_text(f.read())
+        return [Document(page_content=text, metadata={"source": file_path})]
     elif file_path.endswith(".txt"):
+        from langchain_community.document_loaders import TextLoader
         loader = TextLoader(file_path)
     else:
         raise ValueError("Unsupported file type")
     return loader.load()
 
+def load_document_from_bytes(data: bytes, ext: str) -> str:
+    """Extract text from an in-memory PDF, DOCX or TXT file without touching disk."""
+    ext = ext.lower().lstrip(".")
+    if ext == "pdf":
+        return "\n".join(extract_pdf_pages(data))
+    elif ext == "docx":
+        return extract_docx_text(data)
+    elif ext == "txt":
+        return data.decode("utf-8", errors="replace")
+    else:
+        raise ValueError("Unsupported file type")
+
+JD_FETCH_MAX_BYTES = 262_144
+JD_MAX_CHARS = 8000
+
+def fetch_job_description(url: str) -> str:
+    """Fetch a job posting and return its visible text, reading at most JD_FETCH_MAX_BYTES."""
+    from selectolax.parser import HTMLParser
+
+    with requests.get(url, stream=True, timeout=10) as response:
+        response.raise_for_status()
+        raw = response.raw.read(JD_FETCH_MAX_BYTES, decode_content=True)
+
+    tree = HTMLParser(raw)
+    tree.strip_tags(["script", "style", "noscript"])
+    root = tree.body or tree.root
+    text = root.text(separator=" ") if root is not None else ""
+    return " ".join(text.split())[:JD_MAX_CHARS]
+
 def extract_text_from_documents(documents) -> str:
     return "\n".join([doc.page_content for doc in documents])
 
+# Sessions may each enter their own key in the sidebar; keep a few clients alive so
+# alternating sessions don't evict each other's pooled connections.
+GROQ_CLIENT_CACHE_SIZE = 8
+
+@lru_cache(maxsize=GROQ_CLIENT_CACHE_SIZE)
+def _groq_client(api_key: str):
+    return ChatGroq(temperature=0, groq_api_key=api_key, model_name="llama3-8b-8192")
+
+def _groq_llm():
+    # One client per API key (up to GROQ_CLIENT_CACHE_SIZE keys), so its pooled
+    # HTTPS connections are reused across analyses. Async calls go through
+    # _run_in_background to stay on one loop.
+    return _groq_client(os.getenv("GROQ_API_KEY"))
+
+def _cpu_flags() -> set[str]:
+    try:
+        with open("/proc/cpuinfo") as f:
+            for line in f:
+                if line.startswith("flags"):
+                    return set(line.split(":", 1)[1].split())
+    except OSError:
+        pass
+    return set()
+
+def _onnx_model_file() -> str:
+    # The model repo ships int8 exports tuned per instruction set; anything else gets
+    # the fp32 export rather than an int8 build running on fallback kernels.
+    machine = platform.machine().lower()
+    if machine in ("arm64", "aarch64"):
+        return "onnx/model_qint8_arm64.onnx"
+    flags = _cpu_flags()
+    if "avx512_vnni" in flags:
+        return "onnx/model_qint8_avx512_vnni.onnx"
+    if "avx2" in flags:
+        return "onnx/model_quint8_avx2.onnx"
+    return "onnx/model.onnx"
+
+@lru_cache(maxsize=1)
 def get_embeddings_model():
+    # Loading MiniLM costs seconds, so build it once per process. Inference runs on
+    # ONNX Runtime with the export matching this CPU, which is several times faster
+    # than PyTorch eager mode.
+    from langchain_community.embeddings import HuggingFaceEmbeddings
+
     model_name = "sentence-transformers/all-MiniLM-L6-v2"
-    model_kwargs = {"device": "cpu"}
+    model_kwargs = {
+        "device": "cpu",
+        "backend": "onnx",
+        "model_kwargs": {"file_name": _onnx_model_file(), "provider": "CPUExecutionProvider"}
+    }
     encode_kwargs = {"normalize_embeddings": False}
     return HuggingFaceEmbeddings(model_name=model_name, model_kwargs=model_kwargs, encode_kwargs=encode_kwargs)
 
+def build_int8_vectorstore(embeddings, texts: list[str], vectors: list[list[float]], metadatas: list[dict]):
+    # Store vectors as 8-bit scalar-quantized codes (4x smaller than fp32) in an
+    # HNSW graph, so search stays logarithmic as the corpus grows. The quantizer is
+    # calibrated on the corpus itself, and queries are encoded with the same ranges
+    # by FAISS at search time.
+    import faiss
+    import numpy as np
+    from langchain_community.docstore.in_memory import InMemoryDocstore
+    from langchain_community.vectorstores import FAISS
+
+    matrix = np.asarray(vectors, dtype="float32")
+    index = faiss.IndexHNSWSQ(matrix.shape[1], faiss.ScalarQuantizer.QT_8bit, 32)
+    index.hnsw.efConstruction = 200
+    index.hnsw.efSearch = 64
+    index.train(matrix)
+
+    vectorstore = FAISS(embeddings, index, InMemoryDocstore(), {})
+    vectorstore.add_embeddings(zip(texts, vectors), metadatas=metadatas)
+    return vectorstore
+
+CHUNK_SIZE = 1000
+
+def split_if_long(text_splitter, content: str):
+    # Short texts would only yield a couple of chunks, so keep them whole and save
+    # the splitter pass and the extra embedding calls.
+    if len(content) < CHUNK_SIZE * 1.5:
+        return [Document(page_content=content)]
+    return text_splitter.create_documents([content])
+
 def get_rag_chain(resume_content: str, jd_content: str):
-    text_splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200)
-    resume_docs = text_splitter.create_documents([resume_content])
-    jd_docs = text_splitter.create_documents([jd_content])
+    # The RAG path is opt-in and unused by the Streamlit app, so its heavy
+    # dependencies (torch, sentence-transformers, FAISS) are only imported here.
+    from langchain.text_splitter import RecursiveCharacterTextSplitter
+    from langchain.chains import RetrievalQA
+
+    text_splitter = RecursiveCharacterTextSplitter(chunk_size=CHUNK_SIZE, chunk_overlap=200)
+    resume_docs = split_if_long(text_splitter, resume_content)
+    jd_docs = split_if_long(text_splitter, jd_content)
 
     embeddings = get_embeddings_model()
 
-    vectorstore = FAISS.from_documents(resume_docs + jd_docs, embeddings)
+    all_docs = resume_docs + jd_docs
+    texts = [doc.page_content for doc in all_docs]
+    vectors = embeddings.embed_documents(texts)
+    vectorstore = build_int8_vectorstore(embeddings, texts, vectors, [doc.metadata for doc in all_docs])
     retriever = vectorstore.as_retriever()
 
-    llm = ChatGroq(temperature=0, groq_api_key=os.getenv("GROQ_API_KEY"), model_name="llama3-8b-8192")
+    llm = _groq_llm()
 
     qa_chain = RetrievalQA.from_chain_type(
         llm=llm,
@@ -51,63 +232,154 @@ def get_rag_chain(resume_content: str, jd_content: str):
     )
     return qa_chain
 
-def get_matching_score_summary_and_edits(resume_text: str, jd_text: str):
-    llm = ChatGroq(temperature=0, groq_api_key=os.getenv("GROQ_API_KEY"), model_name="llama3-8b-8192")
-    
-    prompt_template = """
+SCORE_PROMPT = PromptTemplate.from_template("""
     You are an AI assistant that specializes in matching resumes to job descriptions.
-    Given a resume and a job description, perform the following tasks:
-    1. Identify key skills from the resume that match the job description.
-    2. Identify relevant project experience from the resume that aligns with the job requirements.
-    3. Assess the overall compatibility between the resume and the job description.
-    4. Generate a matching score out of 100, where 100 is a perfect match.
-    5. Provide a concise summary explaining the matching score, highlighting strengths and weaknesses.
-    6. Suggest specific edits to the resume to better match the job description. Provide these as a bulleted list.
+    Given a resume and a job description, identify the key skills and project experience
+    from the resume that match the job requirements, assess the overall compatibility, and
+    generate a matching score out of 100, where 100 is a perfect match.
 
     Resume: {resume}
     Job Description: {job_description}
 
-    Please provide the output in the following format:
+    Respond with a single JSON object of the form {{"matching_score": <integer from 0 to 100>}}.
+    """)
 
-    Matching Score: [SCORE]/100
-    Summary: [SUMMARY TEXT]
-    Suggested Edits:
-    - [EDIT 1]
-    - [EDIT 2]
-    - ...
-    """
+SUMMARY_PROMPT = PromptTemplate.from_template("""
+    You are an AI assistant that specializes in matching resumes to job descriptions.
+    Given a resume and a job description, provide a concise summary of how well the resume
+    matches the job, highlighting strengths and weaknesses in skills and project experience.
+
+    Resume: {resume}
+    Job Description: {job_description}
+
+    Respond with the summary text only.
+    """)
+
+EDITS_PROMPT = PromptTemplate.from_template("""
+    You are an AI assistant that specializes in matching resumes to job descriptions.
+    Given a resume and a job description, suggest specific edits to the resume to better
+    match the job description.
+
+    Resume: {resume}
+    Job Description: {job_description}
+
+    Respond with a single JSON object of the form {{"suggested_edits": ["<edit 1>", "<edit 2>", ...]}}.
+    """)
 
-    formatted_prompt = prompt_template.format(resume=resume_text, job_description=jd_text)
-    
-    response = llm.invoke(formatted_prompt)
-    
+# Outermost {...} span, for replies that wrap the JSON object in prose or code fences.
+_JSON_OBJECT_RE = re.compile(r"\{.*\}", re.S)
+
+def parse_json_response(response_text: str) -> dict:
+    match = _JSON_OBJECT_RE.search(response_text)
+    if match is None:
+        return {}
+    try:
+        data = json.loads(match.group(0))
+    except json.JSONDecodeError:
+        return {}
+    return data if isinstance(data, dict) else {}
+
+async def _ainvoke_json(llm, prompt: str) -> dict:
+    response = await llm.ainvoke(prompt)
     response_text = response.content if hasattr(response, 'content') else str(response)
-    
-    score = None
-    summary = ""
-    suggested_edits = []
-    
-    lines = response_text.split('\n')
-    
-    current_section = None
-    for line in lines:
-        if 'Matching Score:' in line:
-            current_section = 'score'
-            try:
-                score_part = line.split(':')[1].strip()
-                score = int(score_part.split('/')[0])
-            except (ValueError, IndexError):
-                score = None
-        elif 'Summary:' in line:
-            current_section = 'summary'
-            summary = line.split(':', 1)[1].strip()
-        elif 'Suggested Edits:' in line:
-            current_section = 'edits'
-        elif current_section == 'edits' and line.strip().startswith('-'):
-            suggested_edits.append(line.strip())
-        elif current_section == 'summary':
-            summary += "\n" + line.strip() # Append to summary if it's a multi-line summary
-            
-    return {"matching_score": score, "summary": summary, "suggested_edits": suggested_edits}
+    return parse_json_response(response_text)
+
+def _to_score(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+RESUME_MAX_TOKENS = 3000
+JD_MAX_TOKENS = 2500
+
+# Rough characters-per-token ratio, used when the tiktoken vocabulary is unavailable
+CHARS_PER_TOKEN = 4
+
+@lru_cache(maxsize=1)
+def _tokenizer():
+    # tiktoken downloads the cl100k_base vocabulary on first use unless it is already
+    # in TIKTOKEN_CACHE_DIR. A failed load is cached as None so it is not retried on
+    # every analysis.
+    try:
+        import tiktoken
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception:
+        return None
+
+def truncate_tokens(text: str, max_tokens: int) -> str:
+    # A token covers at least one byte, so short texts can skip tokenization.
+    if len(text.encode()) <= max_tokens:
+        return text
+    encoding = _tokenizer()
+    if encoding is None:
+        return text[:max_tokens * CHARS_PER_TOKEN]
+    tokens = encoding.encode(text)
+    if len(tokens) <= max_tokens:
+        return text
+    return encoding.decode(tokens[:max_tokens])
+
+def truncate_inputs(resume_text: str, jd_text: str) -> tuple[str, str]:
+    """Cap the resume and job description to the prompt token budget, once per analysis."""
+    # Prompt size drives Groq latency, so each side is capped before prompting.
+    return truncate_tokens(resume_text, RESUME_MAX_TOKENS), truncate_tokens(jd_text, JD_MAX_TOKENS)
 
+def _format(template: PromptTemplate, resume_text: str, jd_text: str) -> str:
+    return template.format(resume=resume_text, job_description=jd_text)
 
+@lru_cache(maxsize=1)
+def _background_loop():
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+    return loop
+
+def _run_in_background(coro):
+    # The cached Groq client's async connection pool is bound to the loop it first
+    # ran on, so every async Groq call is scheduled on this one loop.
+    return asyncio.run_coroutine_threadsafe(coro, _background_loop())
+
+def stream_summary(resume_text: str, jd_text: str):
+    """Yield the match summary token by token as Groq generates it. Expects inputs from truncate_inputs."""
+    llm = _groq_llm()
+    for chunk in llm.stream(_format(SUMMARY_PROMPT, resume_text, jd_text)):
+        if chunk.content:
+            yield chunk.content
+
+async def _aget_matching_score_and_edits(resume_text: str, jd_text: str):
+    llm = _groq_llm().bind(response_format={"type": "json_object"})
+
+    # Score and edits are independent, so ask for each in its own short prompt
+    # and let the round-trips overlap.
+    score_data, edits_data = await asyncio.gather(
+        _ainvoke_json(llm, _format(SCORE_PROMPT, resume_text, jd_text)),
+        _ainvoke_json(llm, _format(EDITS_PROMPT, resume_text, jd_text))
+    )
+
+    suggested_edits = edits_data.get("suggested_edits") or []
+    return {
+        "matching_score": _to_score(score_data.get("matching_score")),
+        "suggested_edits": [str(edit) for edit in suggested_edits] if isinstance(suggested_edits, list) else []
+    }
+
+async def _aget_summary(resume_text: str, jd_text: str) -> str:
+    response = await _groq_llm().ainvoke(_format(SUMMARY_PROMPT, resume_text, jd_text))
+    response_text = response.content if hasattr(response, 'content') else str(response)
+    return response_text.strip()
+
+async def _aget_matching_score_summary_and_edits(resume_text: str, jd_text: str):
+    results, summary = await asyncio.gather(
+        _aget_matching_score_and_edits(resume_text, jd_text),
+        _aget_summary(resume_text, jd_text)
+    )
+    return {"matching_score": results["matching_score"], "summary": summary, "suggested_edits": results["suggested_edits"]}
+
+def submit_matching_score_and_edits(resume_text: str, jd_text: str):
+    """Start the score and edits requests in the background and return a concurrent.futures.Future.
+
+    Expects inputs from truncate_inputs.
+    """
+    return _run_in_background(_aget_matching_score_and_edits(resume_text, jd_text))
+
+def get_matching_score_summary_and_edits(resume_text: str, jd_text: str):
+    resume_text, jd_text = truncate_inputs(resume_text, jd_text)
+    return _run_in_background(_aget_matching_score_summary_and_edits(resume_text, jd_text)).result()
@@ -1,7 +1,9 @@
 import streamlit as st
-import tempfile
+import hashlib
 import os
-from main import load_document, extract_text_from_documents, get_matching_score_summary_and_edits
+import threading
+import time
+from main import fetch_job_description, load_document_from_bytes, stream_summary, submit_matching_score_and_edits, truncate_inputs
 import requests
 from urllib.parse import urlparse
 
@@ -43,6 +45,51 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+ANALYSIS_CACHE_MAX_ENTRIES = 128
+ANALYSIS_CACHE_TTL_SECONDS = 3600
+
+def _content_key(*parts) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        digest.update(part if isinstance(part, bytes) else part.encode())
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def _load_resume_text(key: str, ext: str, _data: bytes) -> str:
+    # Keyed on the content hash so re-uploading the same file skips parsing entirely
+    return load_document_from_bytes(_data, ext)
+
+@st.cache_resource
+def _analysis_cache() -> tuple[dict, threading.Lock]:
+    # Finished analyses keyed by (resume, JD) hash, shared across sessions. This is a
+    # plain dict rather than st.cache_data because the summary is streamed, so the
+    # result only exists once the stream has been consumed.
+    return {}, threading.Lock()
+
+def _get_analysis(key: str):
+    cache, lock = _analysis_cache()
+    with lock:
+        entry = cache.get(key)
+        if entry is None:
+            return None
+        stored_at, results = entry
+        if time.monotonic() - stored_at > ANALYSIS_CACHE_TTL_SECONDS:
+            del cache[key]
+            return None
+        return results
+
+def _store_analysis(key: str, results: dict):
+    # Only complete analyses are kept, so a failed or partial reply is retried next time
+    if results["matching_score"] is None or not results["summary"] or not results["suggested_edits"]:
+        return
+    cache, lock = _analysis_cache()
+    with lock:
+        cache.pop(key, None)
+        while len(cache) >= ANALYSIS_CACHE_MAX_ENTRIES:
+            cache.pop(next(iter(cache)))
+        cache[key] = (time.monotonic(), results)
+
 def main():
     st.markdown('<h1 class="main-header"> Resume & JD Matching Engine</h1>', unsafe_allow_html=True)
     st.markdown("### Upload your resume and provide a job description to get an AI-powered compatibility analysis with suggested improvements!")
@@ -76,15 +123,10 @@ def main():
         
         resume_text = ""
         if uploaded_file is not None:
-            # Save uploaded file temporarily
-            with tempfile.NamedTemporaryFile(delete=False, suffix=f".{uploaded_file.name.split('.')[-1]}") as tmp_file:
-                tmp_file.write(uploaded_file.getvalue())
-                tmp_file_path = tmp_file.name
-            
             try:
                 # Load and extract text from document
-                documents = load_document(tmp_file_path)
-                resume_text = extract_text_from_documents(documents)
+                data = uploaded_file.getvalue()
+                resume_text = _load_resume_text(_content_key(data), uploaded_file.name.split('.')[-1], data)
                 
                 st.success(f" Resume loaded successfully! ({len(resume_text)} characters)")
                 
@@ -94,10 +136,6 @@ def main():
                 
             except Exception as e:
                 st.error(f" Error loading resume: {str(e)}")
-            finally:
-                # Clean up temporary file
-                if os.path.exists(tmp_file_path):
-                    os.unlink(tmp_file_path)
     
     with col2:
         st.header(" Job Description")
@@ -116,14 +154,12 @@ def main():
             url = st.text_input("Job Description URL:", placeholder="https://example.com/job-posting")
             if url and st.button("Fetch from URL"):
                 try:
-                    # Simple URL fetching (in a real app, you might want more sophisticated scraping)
-                    response = requests.get(url, timeout=10)
-                    if response.status_code == 200:
-                        jd_text = response.text[:5000]  # Limit to first 5000 characters
-                        st.success(" Job description fetched successfully!")
-                        st.text_area("Fetched Content Preview:", jd_text[:500] + "..." if len(jd_text) > 500 else jd_text, height=150, disabled=True)
-                    else:
-                        st.error(f" Failed to fetch URL. Status code: {response.status_code}")
+                    # Streamed, size-capped fetch reduced to the page's visible text
+                    jd_text = fetch_job_description(url)
+                    st.success(" Job description fetched successfully!")
+                    st.text_area("Fetched Content Preview:", jd_text[:500] + "..." if len(jd_text) > 500 else jd_text, height=150, disabled=True)
+                except requests.HTTPError as e:
+                    st.error(f" Failed to fetch URL. Status code: {e.response.status_code}")
                 except Exception as e:
                     st.error(f" Error fetching URL: {str(e)}")
         
@@ -147,18 +183,45 @@ def main():
             st.error(" Please provide your Groq API key in the sidebar!")
             return
         
+        # Cap both inputs once; every prompt below reuses the capped text
+        resume_text, jd_text = truncate_inputs(resume_text, jd_text)
+        
         # Show loading spinner
         with st.spinner("Analyzing your resume... This may take a moment."):
             try:
-                # Get analysis results
-                results = get_matching_score_summary_and_edits(resume_text, jd_text)
+                # Identical inputs reuse the previous analysis instead of calling Groq again
+                analysis_key = _content_key(resume_text, jd_text)
+                cached_results = _get_analysis(analysis_key)
                 
-                # Display results
-                st.success(" Analysis complete!")
+                # Score and edits run on the background loop while the summary streams in
+                if cached_results is None:
+                    score_and_edits = submit_matching_score_and_edits(resume_text, jd_text)
+                status = st.empty()
                 
                 # Create three columns for results
                 col1, col2, col3 = st.columns([1, 2, 2])
                 
+                with col2:
+                    st.markdown("### Summary")
+                    if cached_results is None:
+                        summary = st.write_stream(stream_summary(resume_text, jd_text))
+                    else:
+                        summary = cached_results["summary"]
+                        if summary:
+                            st.markdown(summary)
+                    if not summary:
+                        st.info("No summary available")
+                
+                if cached_results is None:
+                    results = score_and_edits.result()
+                    results["summary"] = summary
+                    _store_analysis(analysis_key, results)
+                else:
+                    results = cached_results
+                
+                # Display results
+                status.success(" Analysis complete!")
+                
                 with col1:
                     st.markdown('<div class="score-container">', unsafe_allow_html=True)
                     st.markdown("###  Matching Score")
@@ -169,13 +232,6 @@ def main():
                         st.markdown('<div class="score-value" style="color: gray;">N/A</div>', unsafe_allow_html=True)
                     st.markdown('</div>', unsafe_allow_html=True)
                 
-                with col2:
-                    st.markdown("### Summary")
-                    if results["summary"]:
-                        st.markdown(results["summary"])
-                    else:
-                        st.info("No summary available")
-                
                 with col3:
                     st.markdown("### Suggested Edits")
                     if results["suggested_edits"]: